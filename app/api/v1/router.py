@@ -1,18 +1,46 @@
 """API router for bird identification endpoints.
 
-This module handles image upload, bird identification, and species listing.
+This module handles image upload, bird identification, asynchronous
+identification jobs, and species listing.
 """
 
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter, File, HTTPException, Response, UploadFile
+from fastapi import (
+    APIRouter,
+    File,
+    Header,
+    HTTPException,
+    Response,
+    UploadFile,
+)
+from fastapi.concurrency import run_in_threadpool
 
 from app.config import settings
 from app.schemas.bird import BirdResponse
+from app.schemas.job import JobStatus, JobStatusResponse, JobSubmitResponse
+from app.services.jobs import JobQueue, JobWorkerPool
 from app.services.ml import MLService
+from app.services.profiling import Profiler, Trace
 
 api_router = APIRouter()
 ml_service = MLService()
+job_queue = JobQueue(
+    settings.JOB_DB_PATH,
+    lease_seconds=settings.JOB_LEASE_SECONDS,
+    max_attempts=settings.JOB_MAX_ATTEMPTS,
+    retention_seconds=settings.JOB_RETENTION_SECONDS,
+)
+job_workers = JobWorkerPool(
+    job_queue, size=settings.JOB_WORKERS, service_factory=lambda: ml_service
+)
+profiler = Profiler(
+    sample_rate=settings.PROFILING_SAMPLE_RATE,
+    use_cprofile=settings.PROFILING_CPROFILE,
+    dump_dir=settings.PROFILING_DUMP_DIR,
+    allow_force=settings.PROFILING_ALLOW_HEADER,
+    max_traces=settings.PROFILING_MAX_TRACES,
+)
 
 
 @api_router.get("/health")
@@ -25,35 +53,35 @@ async def health_check():
     try:
         # Verify ML service is initialized
         if (
-            ml_service.classifier is None
+            ml_service.interpreter is None
             and settings.ENVIRONMENT != "development"
         ):
             return Response(
                 content="ML service not initialized", status_code=503
             )
+        # Verify background job workers are able to process jobs
+        if not job_workers.healthy():
+            return Response(content="Job workers not running", status_code=503)
         return Response(status_code=200)
     except Exception:
         return Response(content="Service unhealthy", status_code=503)
 
 
-@api_router.post("/identify", response_model=BirdResponse)
-async def identify_bird(
-    image: UploadFile = File(...),
-    threshold: float = ...,  # Required parameter
-    max_results: int = ...,  # Required parameter
-):
-    """Identify birds in the uploaded image.
+async def _read_image(
+    image: UploadFile, threshold: float, max_results: int
+) -> bytes:
+    """Validate identification parameters and read the uploaded image.
 
     Args:
-        image: Image file (jpg, jpeg, or png)
+        image: Uploaded image file
         threshold: Minimum confidence threshold (0-1)
         max_results: Maximum number of predictions to return
 
     Returns:
-        BirdResponse containing predictions and metadata
+        Raw image bytes
 
     Raises:
-        HTTPException: For invalid parameters or processing errors
+        HTTPException: For invalid parameters, file types or sizes
     """
     # Validate parameters
     if not 0 <= threshold <= 1:
@@ -74,33 +102,183 @@ async def identify_bird(
             status_code=400, detail=f"File extension must be one of: {allowed}"
         )
 
-    try:
-        # Read image content
-        content = await image.read()
-        max_mb = settings.MAX_IMAGE_SIZE // (1024 * 1024)
-        if len(content) > settings.MAX_IMAGE_SIZE:
+    # Read image content
+    content = await image.read()
+    max_mb = settings.MAX_IMAGE_SIZE // (1024 * 1024)
+    if len(content) > settings.MAX_IMAGE_SIZE:
+        raise HTTPException(
+            status_code=400,
+            detail=f"File size exceeds maximum of {max_mb}MB",
+        )
+    return content
+
+
+def _resolve_species_list(
+    species_list: Optional[str], api_key: Optional[str]
+) -> Optional[str]:
+    """Determine which species list applies to a request.
+
+    An explicitly requested list wins over the list configured for the
+    API key, which wins over ``DEFAULT_SPECIES_LIST``. Configured lists
+    are validated when the service starts, so only lists requested by the
+    client are checked here.
+
+    Args:
+        species_list: Species list requested by the client
+        api_key: API key sent in the ``X-API-Key`` header
+
+    Returns:
+        Name of the species list, or None to consider all species
+
+    Raises:
+        HTTPException: If the requested species list does not exist
+    """
+    if species_list:
+        if not ml_service.species_filter.exists(species_list):
             raise HTTPException(
                 status_code=400,
-                detail=f"File size exceeds maximum of {max_mb}MB",
+                detail=f"Unknown species list: {species_list}",
             )
+        return species_list
+    return (
+        settings.API_KEY_SPECIES_LISTS.get(api_key or "")
+        or settings.DEFAULT_SPECIES_LIST
+        or None
+    )
 
-        # Get predictions from ML service
-        predictions = await ml_service.predict(
-            image_data=content, threshold=threshold, max_results=max_results
-        )
 
-        return BirdResponse(
-            predictions=predictions,
-            processing_time=0.0,  # TODO: Add actual processing time
-        )
+@api_router.post("/identify", response_model=BirdResponse)
+async def identify_bird(
+    response: Response,
+    image: UploadFile = File(...),
+    threshold: float = ...,  # Required parameter
+    max_results: int = ...,  # Required parameter
+    species_list: Optional[str] = None,
+    x_profile: Optional[str] = Header(None),
+    x_api_key: Optional[str] = Header(None),
+):
+    """Identify birds in the uploaded image.
+
+    Requests are traced when they are sampled by ``PROFILING_SAMPLE_RATE``
+    or, with ``PROFILING_ALLOW_HEADER`` on, when the ``X-Profile`` header
+    is set to a true value. Traced responses carry ``X-Trace-Id`` and
+    ``Server-Timing`` headers.
+
+    Args:
+        response: Outgoing response, used to attach trace headers
+        image: Image file (jpg, jpeg, or png)
+        threshold: Minimum confidence threshold (0-1)
+        max_results: Maximum number of predictions to return
+        species_list: Optional species list to restrict results to
+        x_profile: Optional header forcing a trace of this request
+        x_api_key: Optional API key selecting a configured species list
+
+    Returns:
+        BirdResponse containing predictions and metadata
+
+    Raises:
+        HTTPException: For invalid parameters or processing errors
+    """
+    trace = profiler.start(
+        force=(x_profile or "").lower() in {"1", "true", "yes"}
+    )
+    try:
+        with trace.stage("read"):
+            content = await _read_image(image, threshold, max_results)
+        species_list = _resolve_species_list(species_list, x_api_key)
+
+        try:
+            # Get predictions from ML service
+            predictions, quality_tier = await ml_service.predict(
+                image_data=content,
+                threshold=threshold,
+                max_results=max_results,
+                trace=trace,
+                species_list=species_list,
+            )
+        except Exception as e:
+            error_msg = f"Error processing image: {str(e)}"
+            print(error_msg)  # Print for test output
+            raise HTTPException(status_code=500, detail=error_msg)
+    finally:
+        profiler.finish(trace)
+
+    if isinstance(trace, Trace):
+        response.headers["X-Trace-Id"] = trace.trace_id
+        response.headers["Server-Timing"] = trace.server_timing()
+
+    return BirdResponse(
+        predictions=predictions,
+        processing_time=0.0,  # TODO: Add actual processing time
+        quality_tier=quality_tier,
+    )
+
+
+@api_router.post("/jobs", response_model=JobSubmitResponse, status_code=202)
+async def submit_job(
+    image: UploadFile = File(...),
+    threshold: float = ...,  # Required parameter
+    max_results: int = ...,  # Required parameter
+    species_list: Optional[str] = None,
+    x_api_key: Optional[str] = Header(None),
+):
+    """Queue an image for asynchronous identification.
+
+    Args:
+        image: Image file (jpg, jpeg, or png)
+        threshold: Minimum confidence threshold (0-1)
+        max_results: Maximum number of predictions to return
+        species_list: Optional species list to restrict results to
+        x_api_key: Optional API key selecting a configured species list
+
+    Returns:
+        JobSubmitResponse with the identifier to poll the job with
 
-    except HTTPException:
-        raise
+    Raises:
+        HTTPException: For invalid parameters or queue errors
+    """
+    content = await _read_image(image, threshold, max_results)
+    species_list = _resolve_species_list(species_list, x_api_key)
+
+    try:
+        # SQLite writes block, so keep them off the event loop
+        job_id = await run_in_threadpool(
+            job_queue.submit,
+            image_data=content,
+            threshold=threshold,
+            max_results=max_results,
+            species_list=species_list,
+        )
     except Exception as e:
-        error_msg = f"Error processing image: {str(e)}"
+        error_msg = f"Error queueing job: {str(e)}"
         print(error_msg)  # Print for test output
         raise HTTPException(status_code=500, detail=error_msg)
 
+    job_workers.notify()
+    return JobSubmitResponse(job_id=job_id, status=JobStatus.PENDING)
+
+
+@api_router.get("/jobs/{job_id}", response_model=JobStatusResponse)
+def get_job(job_id: str):
+    """Get the status and, once available, the result of a job.
+
+    A plain function, so FastAPI runs the blocking SQLite read in its
+    threadpool instead of on the event loop.
+
+    Args:
+        job_id: Identifier returned when the job was submitted
+
+    Returns:
+        JobStatusResponse describing the job
+
+    Raises:
+        HTTPException: If the job does not exist
+    """
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
 
 @api_router.get("/species", response_model=List[str])
 async def list_species():
@@ -118,3 +296,13 @@ async def list_species():
         error_msg = f"Error fetching species list: {str(e)}"
         print(error_msg)  # Print for test output
         raise HTTPException(status_code=500, detail=error_msg)
+
+
+@api_router.get("/species/lists", response_model=List[str])
+async def list_species_lists():
+    """Get the names of the species lists predictions can be filtered by.
+
+    Returns:
+        List of species list names
+    """
+    return ml_service.species_filter.available()
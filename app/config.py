@@ -3,6 +3,8 @@
 This module handles environment variables and application settings using Pydantic.
 """
 
+from typing import Optional
+
 from pydantic import validator
 from pydantic_settings import BaseSettings
 
@@ -17,6 +19,30 @@ class Settings(BaseSettings):
         MODEL_PATH: Path to TFLite model file
         MAX_IMAGE_SIZE: Maximum allowed image size in bytes
         ALLOWED_EXTENSIONS: Set of allowed image file extensions
+        JOB_DB_PATH: Path to the SQLite database backing the job queue
+        JOB_WORKERS: Number of background workers processing jobs
+        JOB_LEASE_SECONDS: Time after which a running job is reclaimed
+        JOB_MAX_ATTEMPTS: Number of attempts before a job is marked failed
+        JOB_RETENTION_SECONDS: Time finished jobs are kept before they are
+            deleted, 0 to keep them forever
+        PROFILING_SAMPLE_RATE: Fraction of requests to trace (0 disables)
+        PROFILING_CPROFILE: Whether traces include a cProfile capture
+        PROFILING_DUMP_DIR: Directory request traces are written to
+        PROFILING_ALLOW_HEADER: Whether clients may force a trace with the
+            X-Profile header
+        PROFILING_MAX_TRACES: Number of traces kept in the dump directory
+        SPECIES_LISTS_DIR: Directory containing species list files
+        DEFAULT_SPECIES_LIST: Species list applied when none is requested
+        API_KEY_SPECIES_LISTS: Species list applied per X-API-Key header
+        ADAPTIVE_ENABLED: Whether to degrade inference quality under load
+        ADAPTIVE_LATENCY_THRESHOLD: Estimated wait in seconds for a
+            full-quality interpreter that triggers degraded mode
+        ADAPTIVE_REDUCED_INTERPRETERS: Interpreters serving degraded mode
+        ADAPTIVE_REDUCED_THREADS: Threads per degraded-mode interpreter
+        ADAPTIVE_CACHE_SIZE: Number of image scores to cache
+        ADAPTIVE_CACHE_DISTANCE: Differing bits of the 256-bit perceptual
+            hash up to which images share cached scores; 0 only reuses
+            the scores of byte-identical images
     """
 
     # API Settings
@@ -31,6 +57,33 @@ class Settings(BaseSettings):
     MAX_IMAGE_SIZE: int = 10 * 1024 * 1024  # 10MB
     ALLOWED_EXTENSIONS: set[str] = {"jpg", "jpeg", "png"}
 
+    # Job Queue Settings
+    JOB_DB_PATH: str = "data/jobs.db"
+    JOB_WORKERS: int = 2
+    JOB_LEASE_SECONDS: float = 300.0
+    JOB_MAX_ATTEMPTS: int = 3
+    JOB_RETENTION_SECONDS: float = 86400.0
+
+    # Profiling Settings
+    PROFILING_SAMPLE_RATE: float = 0.0
+    PROFILING_CPROFILE: bool = False
+    PROFILING_DUMP_DIR: str = "traces"
+    PROFILING_ALLOW_HEADER: bool = False
+    PROFILING_MAX_TRACES: int = 100
+
+    # Species Filter Settings
+    SPECIES_LISTS_DIR: str = "data/species_lists"
+    DEFAULT_SPECIES_LIST: Optional[str] = None
+    API_KEY_SPECIES_LISTS: dict[str, str] = {}
+
+    # Adaptive Quality Settings
+    ADAPTIVE_ENABLED: bool = False
+    ADAPTIVE_LATENCY_THRESHOLD: float = 0.5
+    ADAPTIVE_REDUCED_INTERPRETERS: int = 4
+    ADAPTIVE_REDUCED_THREADS: int = 1
+    ADAPTIVE_CACHE_SIZE: int = 256
+    ADAPTIVE_CACHE_DISTANCE: int = 0
+
     @validator("ENVIRONMENT")
     def validate_environment(cls, v: str) -> str:
         """Validate the environment setting.
@@ -49,6 +102,23 @@ class Settings(BaseSettings):
             raise ValueError(f"Environment must be one of {allowed}")
         return v
 
+    @validator("PROFILING_SAMPLE_RATE")
+    def validate_sample_rate(cls, v: float) -> float:
+        """Validate the profiling sample rate.
+
+        Args:
+            v: Sample rate to validate
+
+        Returns:
+            Validated sample rate
+
+        Raises:
+            ValueError: If the sample rate is not between 0 and 1
+        """
+        if not 0 <= v <= 1:
+            raise ValueError("Sample rate must be between 0 and 1")
+        return v
+
     class Config:
         """Pydantic configuration."""
 
@@ -4,20 +4,32 @@ This module initializes the FastAPI application, configures middleware,
 and sets up API routes.
 """
 
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.api.v1.router import api_router
+from app.api.v1.router import api_router, job_workers
 from app.config import Settings
 
 # Load settings
 settings = Settings()
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Run the background job workers for the lifetime of the app."""
+    job_workers.start()
+    yield
+    job_workers.stop()
+
+
 # Create FastAPI app
 app = FastAPI(
     title="BirdIdentifier API",
     description="A REST API service for identifying birds in images",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # Add CORS middleware
@@ -5,6 +5,10 @@ and common bird names.
 """
 
 import sqlite3
+from typing import Dict, List
+
+# Maximum number of names bound to a single lookup query
+QUERY_CHUNK_SIZE = 500
 
 
 def get_common_name(scientific_name: str) -> str:
@@ -34,3 +38,41 @@ def get_common_name(scientific_name: str) -> str:
     except Exception as e:
         print(f"Error looking up bird name: {str(e)}")
         return "Unknown Bird"
+
+
+def get_scientific_names(common_names: List[str]) -> Dict[str, str]:
+    """Get scientific names for a list of common bird names.
+
+    Names are looked up in chunks of ``QUERY_CHUNK_SIZE`` so long lists
+    stay below SQLite's limit on query parameters.
+
+    Args:
+        common_names: Common names of bird species
+
+    Returns:
+        Mapping of each common name found to its scientific name
+
+    Raises:
+        sqlite3.Error: If the database lookup fails
+    """
+    names: Dict[str, str] = {}
+    if not common_names:
+        return names
+    conn = sqlite3.connect("data/birdnames.db")
+    try:
+        cursor = conn.cursor()
+        for start in range(0, len(common_names), QUERY_CHUNK_SIZE):
+            chunk = common_names[start : start + QUERY_CHUNK_SIZE]
+            placeholders = ", ".join("?" for _ in chunk)
+            cursor.execute(
+                "SELECT common_name, scientific_name FROM birdnames"
+                f" WHERE common_name IN ({placeholders})",
+                chunk,
+            )
+            names.update(cursor.fetchall())
+    except sqlite3.Error as e:
+        print(f"Error looking up bird names: {str(e)}")
+        raise
+    finally:
+        conn.close()
+    return names
@@ -4,6 +4,7 @@ This module defines the data models for bird predictions and API responses.
 """
 
 from datetime import datetime
+from enum import Enum
 from typing import List
 
 from pydantic import BaseModel, Field
@@ -27,12 +28,27 @@ class BirdPrediction(BaseModel):
     )
 
 
+class QualityTier(str, Enum):
+    """Quality of the inference path that produced a response.
+
+    FULL uses the full-quality path, REDUCED the cheaper path taken under
+    overload, and CACHED reuses the scores of an earlier identical image
+    (or, with ``ADAPTIVE_CACHE_DISTANCE`` raised, a perceptually similar
+    one).
+    """
+
+    FULL = "full"
+    REDUCED = "reduced"
+    CACHED = "cached"
+
+
 class BirdResponse(BaseModel):
     """API response for bird identification.
 
     Attributes:
         predictions: List of bird predictions
         processing_time: Time taken to process the image
+        quality_tier: Quality of the inference path that was used
         timestamp: UTC timestamp of the prediction
     """
 
@@ -42,6 +58,10 @@ class BirdResponse(BaseModel):
     processing_time: float = Field(
         ..., description="Time taken to process the image in seconds"
     )
+    quality_tier: QualityTier = Field(
+        QualityTier.FULL,
+        description="Quality of the inference path that was used",
+    )
     timestamp: datetime = Field(
         default_factory=datetime.utcnow,
         description="Timestamp of the prediction",
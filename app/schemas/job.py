@@ -0,0 +1,53 @@
+"""Pydantic models for asynchronous identification jobs.
+
+This module defines the job states and the API responses for submitting
+and polling identification jobs.
+"""
+
+from enum import Enum
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+from app.schemas.bird import BirdResponse
+
+
+class JobStatus(str, Enum):
+    """Lifecycle states of an identification job."""
+
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+class JobSubmitResponse(BaseModel):
+    """API response for a submitted identification job.
+
+    Attributes:
+        job_id: Identifier to poll the job with
+        status: Current state of the job
+    """
+
+    job_id: str = Field(..., description="Identifier of the submitted job")
+    status: JobStatus = Field(..., description="Current state of the job")
+
+
+class JobStatusResponse(BaseModel):
+    """API response describing the state of an identification job.
+
+    Attributes:
+        job_id: Identifier of the job
+        status: Current state of the job
+        result: Identification result once the job completed
+        error: Error message if the job failed
+    """
+
+    job_id: str = Field(..., description="Identifier of the job")
+    status: JobStatus = Field(..., description="Current state of the job")
+    result: Optional[BirdResponse] = Field(
+        None, description="Identification result once the job completed"
+    )
+    error: Optional[str] = Field(
+        None, description="Error message if the job failed"
+    )
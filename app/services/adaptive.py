@@ -0,0 +1,175 @@
+"""Load tracking and result caching for adaptive quality under overload.
+
+This module provides the pieces MLService uses to degrade gracefully when
+it is saturated: a monitor estimating how long requests would wait for
+full-quality inference, and a cache of model scores keyed by image content so
+repeated images can skip inference.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+
+
+class LoadMonitor:
+    """Estimates the wait for full-quality inference and when to degrade.
+
+    The estimate is the time a new request would queue for a full-quality
+    interpreter: the requests in flight beyond the ``capacity`` of the
+    full-quality interpreters, times the moving average of their inference
+    time. Neither depends on the tier requests are actually served at, so
+    serving cheaper results does not end degraded mode while the load
+    lasts. The monitor switches to degraded mode once the estimate exceeds
+    ``threshold`` and back only once it drops below half of it, so it does
+    not flap around the threshold.
+    """
+
+    def __init__(
+        self, threshold: float, capacity: int = 1, smoothing: float = 0.2
+    ):
+        """Configure the monitor.
+
+        Args:
+            threshold: Estimated wait in seconds above which to degrade
+            capacity: Number of full-quality interpreters
+            smoothing: Weight of the newest sample in the moving average
+        """
+        self.threshold = threshold
+        self.capacity = capacity
+        self.smoothing = smoothing
+        self.service_time = 0.0
+        self.queue_latency = 0.0
+        self.in_flight = 0
+        self.degraded = False
+        self._lock = threading.Lock()
+
+    def enter(self) -> bool:
+        """Admit a request and decide whether to degrade it.
+
+        Every call must be paired with a call to :meth:`leave`.
+
+        Returns:
+            Whether the service is in degraded mode
+        """
+        with self._lock:
+            queued = max(0, self.in_flight + 1 - self.capacity)
+            self.in_flight += 1
+            self.queue_latency = queued * self.service_time / self.capacity
+            if self.degraded:
+                self.degraded = self.queue_latency > self.threshold / 2
+            else:
+                self.degraded = self.queue_latency > self.threshold
+            return self.degraded
+
+    def leave(self):
+        """Mark an admitted request as finished."""
+        with self._lock:
+            self.in_flight -= 1
+
+    def record(self, service_time: float):
+        """Record the duration of a full-quality inference.
+
+        Args:
+            service_time: Seconds the interpreter took
+        """
+        with self._lock:
+            if self.service_time == 0.0:
+                self.service_time = service_time
+            else:
+                self.service_time += self.smoothing * (
+                    service_time - self.service_time
+                )
+
+
+class ScoreCache:
+    """LRU cache of model scores keyed by image content.
+
+    Keys are content digests (:func:`content_digest`) by default, and
+    lookups only match identical keys. With a positive ``max_distance``
+    the keys are perceptual hashes (:func:`image_hash`), and lookups match
+    any cached hash within that many differing bits, so near-duplicates
+    hit even when a few cells of their hash flipped.
+    """
+
+    def __init__(self, size: int, max_distance: int = 0):
+        """Create an empty cache.
+
+        Args:
+            size: Maximum number of cached entries
+            max_distance: Maximum Hamming distance of a matching hash
+        """
+        self.size = size
+        self.max_distance = max_distance
+        self._entries: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: bytes) -> Optional[np.ndarray]:
+        """Get the cached scores for a matching image key, if any."""
+        with self._lock:
+            match = key if key in self._entries else self._nearest(key)
+            if match is None:
+                return None
+            self._entries.move_to_end(match)
+            return self._entries[match]
+
+    def _nearest(self, key: bytes) -> Optional[bytes]:
+        """Find the closest cached hash within ``max_distance`` bits."""
+        if not self._entries or self.max_distance <= 0:
+            return None
+        keys = list(self._entries)
+        hashes = np.frombuffer(b"".join(keys), dtype=np.uint8)
+        hashes = hashes.reshape(len(keys), -1)
+        query = np.frombuffer(key, dtype=np.uint8)
+        distances = np.unpackbits(hashes ^ query, axis=1).sum(axis=1)
+        best = int(np.argmin(distances))
+        if distances[best] > self.max_distance:
+            return None
+        return keys[best]
+
+    def put(self, key: bytes, scores: np.ndarray):
+        """Cache the scores for an image key."""
+        if self.size <= 0:
+            return
+        scores.flags.writeable = False
+        with self._lock:
+            self._entries[key] = scores
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+
+def content_digest(image_data: bytes) -> bytes:
+    """Compute a digest of the raw image bytes.
+
+    Args:
+        image_data: Raw image bytes
+
+    Returns:
+        16-byte digest, equal only for byte-identical images
+    """
+    return hashlib.blake2b(image_data, digest_size=16).digest()
+
+
+def image_hash(image: np.ndarray) -> bytes:
+    """Compute a perceptual hash of a preprocessed image.
+
+    Images are reduced to a 16x16 grayscale grid and each cell is compared
+    with the mean brightness (an average hash), so re-encoded or slightly
+    altered copies of an image share the same hash. So can different
+    images with a similar layout, such as two birds photographed in front
+    of the same feeder.
+
+    Args:
+        image: Preprocessed image array (224x224x3 uint8)
+
+    Returns:
+        32-byte hash of the image
+    """
+    gray = image.mean(axis=2)
+    height, width = gray.shape
+    cells = gray[: height - height % 16, : width - width % 16]
+    cells = cells.reshape(16, height // 16, 16, width // 16).mean(axis=(1, 3))
+    return np.packbits(cells > cells.mean()).tobytes()
@@ -0,0 +1,396 @@
+"""Asynchronous identification jobs backed by a local SQLite queue.
+
+This module persists submitted images in a SQLite database and drains them
+with a pool of background worker threads, so long-running inference is
+decoupled from the HTTP request that submitted it.
+"""
+
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Callable, List, Optional, Set
+
+from app.schemas.bird import BirdResponse
+from app.schemas.job import JobStatus, JobStatusResponse
+from app.services.ml import MLService
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    image BLOB,
+    threshold REAL NOT NULL,
+    max_results INTEGER NOT NULL,
+    species_list TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    result TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    claimed_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_status_created
+    ON jobs (status, created_at);
+"""
+
+
+class JobQueue:
+    """Persistent FIFO queue of identification jobs.
+
+    Every operation opens its own connection, so a single instance can be
+    shared between the request handlers and the worker threads. A job that
+    stays ``running`` for longer than ``lease_seconds`` is assumed to belong
+    to a worker that died and is handed out again. Finished jobs are kept
+    for ``retention_seconds`` so their results can be polled, then deleted
+    by :meth:`purge`.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        lease_seconds: float = 300.0,
+        max_attempts: int = 3,
+        retention_seconds: float = 86400.0,
+    ):
+        """Create the queue and its table if they do not exist yet.
+
+        Args:
+            db_path: Path to the SQLite database file
+            lease_seconds: Time after which a running job can be reclaimed
+            max_attempts: Number of claims before a job is marked failed
+            retention_seconds: Time finished jobs are kept, 0 to keep them
+                forever
+        """
+        self.db_path = db_path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retention_seconds = retention_seconds
+        conn = self._connect()
+        try:
+            conn.executescript(_SCHEMA)
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection in autocommit mode with a generous timeout."""
+        conn = sqlite3.connect(self.db_path, timeout=30.0)
+        conn.isolation_level = None
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def submit(
+        self,
+        image_data: bytes,
+        threshold: float,
+        max_results: int,
+        species_list: Optional[str] = None,
+    ) -> str:
+        """Store a new pending job.
+
+        Args:
+            image_data: Raw image bytes to process
+            threshold: Minimum confidence threshold (0-1)
+            max_results: Maximum number of predictions to return
+            species_list: Name of a species list to restrict results to
+
+        Returns:
+            Identifier of the newly created job
+        """
+        job_id = uuid.uuid4().hex
+        conn = self._connect()
+        try:
+            conn.execute(
+                "INSERT INTO jobs (id, status, image, threshold, max_results,"
+                " species_list, created_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    job_id,
+                    JobStatus.PENDING.value,
+                    sqlite3.Binary(image_data),
+                    threshold,
+                    max_results,
+                    species_list,
+                    time.time(),
+                ),
+            )
+        finally:
+            conn.close()
+        return job_id
+
+    def claim(self) -> Optional[sqlite3.Row]:
+        """Atomically take the oldest available job.
+
+        Jobs whose lease expired are either handed out again or, once they
+        used up ``max_attempts``, marked as failed.
+
+        Returns:
+            The claimed job row, or None if the queue is empty
+        """
+        now = time.time()
+        stale = now - self.lease_seconds
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "UPDATE jobs SET status = ?, image = NULL, finished_at = ?,"
+                " error = 'Job exceeded maximum number of attempts'"
+                " WHERE status = ? AND claimed_at < ? AND attempts >= ?",
+                (
+                    JobStatus.FAILED.value,
+                    now,
+                    JobStatus.RUNNING.value,
+                    stale,
+                    self.max_attempts,
+                ),
+            )
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE status = ?"
+                " OR (status = ? AND claimed_at < ?)"
+                " ORDER BY created_at LIMIT 1",
+                (JobStatus.PENDING.value, JobStatus.RUNNING.value, stale),
+            ).fetchone()
+            if row is not None:
+                conn.execute(
+                    "UPDATE jobs SET status = ?, claimed_at = ?,"
+                    " attempts = attempts + 1 WHERE id = ?",
+                    (JobStatus.RUNNING.value, now, row["id"]),
+                )
+            conn.execute("COMMIT")
+            return row
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def complete(self, job_id: str, response: BirdResponse):
+        """Store the result of a finished job and drop its image."""
+        self._finish(
+            job_id, JobStatus.COMPLETED, result=response.model_dump_json()
+        )
+
+    def fail(self, job_id: str, error: str):
+        """Mark a job as failed and drop its image."""
+        self._finish(job_id, JobStatus.FAILED, error=error)
+
+    def _finish(
+        self,
+        job_id: str,
+        status: JobStatus,
+        result: Optional[str] = None,
+        error: Optional[str] = None,
+    ):
+        """Move a job into a terminal state."""
+        conn = self._connect()
+        try:
+            conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?,"
+                " image = NULL, finished_at = ? WHERE id = ?",
+                (status.value, result, error, time.time(), job_id),
+            )
+        finally:
+            conn.close()
+
+    def purge(self) -> int:
+        """Delete finished jobs older than the retention period.
+
+        Returns:
+            Number of jobs deleted
+        """
+        if self.retention_seconds <= 0:
+            return 0
+        conn = self._connect()
+        try:
+            cursor = conn.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?) AND finished_at < ?",
+                (
+                    JobStatus.COMPLETED.value,
+                    JobStatus.FAILED.value,
+                    time.time() - self.retention_seconds,
+                ),
+            )
+            return cursor.rowcount
+        finally:
+            conn.close()
+
+    def get(self, job_id: str) -> Optional[JobStatusResponse]:
+        """Look up the current state of a job.
+
+        Args:
+            job_id: Identifier returned by :meth:`submit`
+
+        Returns:
+            JobStatusResponse for the job, or None if it does not exist
+        """
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT id, status, result, error FROM jobs WHERE id = ?",
+                (job_id,),
+            ).fetchone()
+        finally:
+            conn.close()
+
+        if row is None:
+            return None
+        result = None
+        if row["result"] is not None:
+            result = BirdResponse.model_validate_json(row["result"])
+        return JobStatusResponse(
+            job_id=row["id"],
+            status=JobStatus(row["status"]),
+            result=result,
+            error=row["error"],
+        )
+
+
+class JobWorkerPool:
+    """Pool of background threads draining a :class:`JobQueue`.
+
+    Workers take their MLService from ``service_factory`` and call its
+    blocking ``predict_sync`` directly. The API hands them its own service,
+    so jobs draw on the same interpreter pools and load monitor as
+    ``/identify`` requests. Idle workers purge expired jobs from the queue
+    at most once per ``purge_interval``. Workers survive errors: they log
+    them, wait ``retry_interval`` and carry on, getting their MLService
+    again if that is what failed.
+    """
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        size: int,
+        poll_interval: float = 1.0,
+        service_factory: Callable[[], MLService] = MLService,
+        retry_interval: float = 5.0,
+        purge_interval: float = 60.0,
+    ):
+        """Configure the pool without starting it.
+
+        Args:
+            queue: Queue to take jobs from
+            size: Number of worker threads
+            poll_interval: Seconds to wait between polls of an empty queue
+            service_factory: Callable returning the MLService of a worker
+            retry_interval: Seconds to wait after a worker error
+            purge_interval: Minimum seconds between purges of expired jobs
+        """
+        self.queue = queue
+        self.size = size
+        self.poll_interval = poll_interval
+        self.service_factory = service_factory
+        self.retry_interval = retry_interval
+        self.purge_interval = purge_interval
+        self._next_purge = 0.0
+        self._purge_lock = threading.Lock()
+        self._ready: Set[int] = set()
+        self._ready_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._wakeup = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def start(self):
+        """Start the worker threads."""
+        if self._threads:
+            return
+        self._stop.clear()
+        for index in range(self.size):
+            thread = threading.Thread(
+                target=self._run, name=f"job-worker-{index}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: Optional[float] = None):
+        """Stop the worker threads, letting in-flight jobs finish.
+
+        Args:
+            timeout: Maximum seconds to wait for each thread
+        """
+        self._stop.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        with self._ready_lock:
+            self._ready.clear()
+
+    def healthy(self) -> bool:
+        """Check whether a started pool has a worker able to process jobs.
+
+        Returns:
+            False if the pool was started but no worker thread is alive
+            with a working MLService, True otherwise
+        """
+        if not self._threads:
+            return True
+        with self._ready_lock:
+            return any(
+                thread.is_alive() and thread.ident in self._ready
+                for thread in self._threads
+            )
+
+    def notify(self):
+        """Wake idle workers after a job was submitted."""
+        self._wakeup.set()
+
+    def _run(self):
+        """Claim and process jobs until the pool is stopped."""
+        name = threading.current_thread().name
+        ident = threading.get_ident()
+        service = None
+        while not self._stop.is_set():
+            try:
+                if service is None:
+                    service = self.service_factory()
+                    with self._ready_lock:
+                        self._ready.add(ident)
+                job = self.queue.claim()
+                if job is None:
+                    self._purge()
+                    self._wakeup.wait(self.poll_interval)
+                    self._wakeup.clear()
+                    continue
+                self._process(service, job)
+            except Exception as e:
+                if service is None:
+                    print(f"{name} failed to get ML service: {str(e)}")
+                else:
+                    print(f"{name} error: {str(e)}")
+                self._stop.wait(self.retry_interval)
+        with self._ready_lock:
+            self._ready.discard(ident)
+
+    def _purge(self):
+        """Purge expired jobs unless another worker did so recently."""
+        with self._purge_lock:
+            now = time.monotonic()
+            if now < self._next_purge:
+                return
+            self._next_purge = now + self.purge_interval
+        deleted = self.queue.purge()
+        if deleted:
+            print(f"Purged {deleted} expired jobs")
+
+    def _process(self, service: MLService, job: sqlite3.Row):
+        """Run inference for a claimed job and record the outcome."""
+        start = time.perf_counter()
+        try:
+            predictions, quality_tier = service.predict_sync(
+                image_data=job["image"],
+                threshold=job["threshold"],
+                max_results=job["max_results"],
+                species_list=job["species_list"],
+            )
+            self.queue.complete(
+                job["id"],
+                BirdResponse(
+                    predictions=predictions,
+                    processing_time=time.perf_counter() - start,
+                    quality_tier=quality_tier,
+                ),
+            )
+        except Exception as e:
+            print(f"Job {job['id']} failed: {str(e)}")
+            self.queue.fail(job["id"], str(e))
@@ -4,16 +4,32 @@ This module handles TensorFlow Lite model loading, image preprocessing,
 and bird species prediction using computer vision.
 """
 
+import asyncio
 import io
-from typing import List
+import json
+import queue
+import time
+from typing import List, Optional, Tuple, Union
 
 import numpy as np
 from PIL import Image, ImageOps
-from tflite_support.task import core, processor, vision
+from tflite_runtime.interpreter import Interpreter
+from tflite_support import metadata
 
 from app.config import settings
 from app.queries import get_common_name
-from app.schemas.bird import BirdPrediction
+from app.schemas.bird import BirdPrediction, QualityTier
+from app.services.adaptive import (
+    LoadMonitor,
+    ScoreCache,
+    content_digest,
+    image_hash,
+)
+from app.services.profiling import NULL_TRACE, NullTrace, Trace
+from app.services.species import SpeciesFilter, top_predictions
+
+# Output index of the model's background class
+BACKGROUND_INDEX = 964
 
 
 class MLService:
@@ -23,17 +39,36 @@ class MLService:
     - Loading and managing the TFLite model
     - Image preprocessing and inference
     - Converting model outputs to bird predictions
+    - Degrading to cheaper inference when overloaded (``ADAPTIVE_ENABLED``)
+
+    Inference runs off the event loop on a pool of interpreters. The full
+    quality tier uses one interpreter with several threads. When requests
+    queue up for it, the adaptive mode switches to the reduced tier, which
+    decodes JPEGs at reduced scale, spreads requests over several
+    single-threaded interpreters, and serves repeated images from a
+    score cache.
     """
 
     def __init__(self):
         """Initialize the ML service.
 
-        Sets up the TensorFlow Lite classifier and species data.
+        Sets up the TensorFlow Lite interpreter and species data.
         Falls back to development mode if model loading fails.
         """
-        self.classifier = None
+        self.interpreter = None
         self.species_list = None
         self.scientific_names = None
+        self.species_filter = None
+        # The full quality tier runs on a single interpreter
+        self.monitor = LoadMonitor(
+            settings.ADAPTIVE_LATENCY_THRESHOLD, capacity=1
+        )
+        self.score_cache = ScoreCache(
+            settings.ADAPTIVE_CACHE_SIZE,
+            max_distance=settings.ADAPTIVE_CACHE_DISTANCE,
+        )
+        self._full_pool: queue.Queue = queue.Queue()
+        self._reduced_pool: Optional[queue.Queue] = None
         self._load_model()
         self._initialize_species_data()
 
@@ -49,66 +84,142 @@ class MLService:
         """
         try:
             print(f"Attempting to load model from: {settings.MODEL_PATH}")
-            # Initialize the image classification model
-            base_options = core.BaseOptions(
-                file_name=settings.MODEL_PATH, use_coral=False, num_threads=4
-            )
-            classification_options = processor.ClassificationOptions(
-                # At least 1, but allow for more if requested
-                max_results=max(3, 1),
-                score_threshold=0.0,  # We'll filter by threshold later
-            )
-            options = vision.ImageClassifierOptions(
-                base_options=base_options,
-                classification_options=classification_options,
-            )
-
-            # Create classifier
-            self.classifier = vision.ImageClassifier.create_from_options(
-                options
-            )
+            self.interpreter = self._create_interpreter(num_threads=4)
+            self._full_pool.put(self.interpreter)
             print("Successfully loaded TFLite model")
         except Exception as e:
             # For development, we'll create a dummy model
             if settings.ENVIRONMENT == "development":
                 print("Failed to load model, falling back to development mode")
-                self.classifier = None
+                self.interpreter = None
+                return
             else:
                 print(f"Failed to load model with error: {str(e)}")
                 raise Exception(f"Failed to load model: {str(e)}")
 
+        if settings.ADAPTIVE_ENABLED:
+            self._reduced_pool = queue.Queue()
+            for _ in range(settings.ADAPTIVE_REDUCED_INTERPRETERS):
+                self._reduced_pool.put(
+                    self._create_interpreter(
+                        num_threads=settings.ADAPTIVE_REDUCED_THREADS
+                    )
+                )
+
+    def _create_interpreter(self, num_threads: int) -> Interpreter:
+        """Create a TFLite interpreter for the configured model.
+
+        Args:
+            num_threads: Number of threads the interpreter may use
+
+        Returns:
+            Interpreter with its tensors allocated
+        """
+        interpreter = Interpreter(
+            model_path=settings.MODEL_PATH, num_threads=num_threads
+        )
+        interpreter.allocate_tensors()
+        return interpreter
+
+    def _read_labels(self) -> List[str]:
+        """Read the output class labels from the model metadata.
+
+        Returns:
+            Label of each model output class, by index
+
+        Raises:
+            ValueError: If the model carries no English label file
+        """
+        displayer = metadata.MetadataDisplayer.with_model_file(
+            settings.MODEL_PATH
+        )
+        model_metadata = json.loads(displayer.get_metadata_json())
+        output = model_metadata["subgraph_metadata"][0][
+            "output_tensor_metadata"
+        ][0]
+        for associated_file in output.get("associated_files", []):
+            if (
+                associated_file.get("type") == "TENSOR_AXIS_LABELS"
+                and associated_file.get("locale") == "en"
+            ):
+                buffer = displayer.get_associated_file_buffer(
+                    associated_file["name"]
+                )
+                return buffer.decode("utf-8").splitlines()
+        raise ValueError("Model metadata has no English label file")
+
     def _initialize_species_data(self):
         """Initialize bird species data.
 
-        Note: Not needed anymore since we use the model's display_name
-        directly.
+        Reads the scientific name of every model output class from the
+        model metadata and sets up the species filter over them. Without a
+        model, in development mode, the filter covers the development
+        birds instead. The masks of the configured species lists are
+        compiled up front.
+
+        Raises:
+            ValueError: If a configured species list does not exist
         """
-        pass
+        if self.interpreter is None:
+            self.scientific_names = [
+                scientific for scientific, _ in self.DEV_BIRDS
+            ]
+            excluded = []
+        else:
+            self.scientific_names = self._read_labels()
+            excluded = [BACKGROUND_INDEX]
+
+        self.species_filter = SpeciesFilter(
+            self.scientific_names,
+            settings.SPECIES_LISTS_DIR,
+            excluded=excluded,
+        )
+
+        configured = set(settings.API_KEY_SPECIES_LISTS.values())
+        if settings.DEFAULT_SPECIES_LIST:
+            configured.add(settings.DEFAULT_SPECIES_LIST)
+        for name in sorted(configured):
+            if not self.species_filter.exists(name):
+                raise ValueError(
+                    f"Configured species list does not exist: {name}"
+                )
+            self.species_filter.mask(name)
 
-    async def _preprocess_image(self, image_data: bytes) -> np.ndarray:
+    def _preprocess_image(
+        self, image_data: bytes, draft: bool = False
+    ) -> np.ndarray:
         """Preprocess an image for model input.
 
         Args:
             image_data: Raw image bytes
+            draft: Let JPEGs decode at the smallest scale that still covers
+                the model input, trading some quality for speed
 
         Returns:
             numpy.ndarray: Preprocessed image array (224x224x3 uint8)
         """
         image = Image.open(io.BytesIO(image_data))
+        max_size = (224, 224)
+        if draft:
+            image.draft("RGB", max_size)
         # Convert to RGB if necessary
         if image.mode != "RGB":
             image = image.convert("RGB")
 
         # Resize while maintaining aspect ratio
-        max_size = (224, 224)
         image.thumbnail(max_size)
 
-        # Pad the image to fill the remaining space
+        # Pad the image to fill the remaining space, putting the odd pixel
+        # on the right or bottom so the result matches the model input
+        pad_x = max_size[0] - image.size[0]
+        pad_y = max_size[1] - image.size[1]
         padded_image = ImageOps.expand(
             image,
             border=(
-                (max_size[0] - image.size[0]) // 2,
-                (max_size[1] - image.size[1]) // 2,
+                pad_x // 2,
+                pad_y // 2,
+                pad_x - pad_x // 2,
+                pad_y - pad_y // 2,
             ),
             fill="black",
         )
@@ -116,30 +227,136 @@ class MLService:
         return np.array(padded_image, dtype=np.uint8)
 
     async def predict(
-        self, image_data: bytes, threshold: float, max_results: int
-    ) -> List[BirdPrediction]:
+        self,
+        image_data: bytes,
+        threshold: float,
+        max_results: int,
+        trace: Union[Trace, NullTrace] = NULL_TRACE,
+        species_list: Optional[str] = None,
+    ) -> Tuple[List[BirdPrediction], QualityTier]:
         """Process an image and return bird species predictions.
 
+        Admits the request with the load monitor, then runs the
+        prediction in an executor thread so decoding and inference do not
+        block the event loop.
+
         Args:
             image_data: Raw image bytes to process
             threshold: Minimum confidence threshold (0-1)
             max_results: Maximum number of predictions to return
+            trace: Trace recording the duration of each stage
+            species_list: Name of a species list to restrict results to
 
         Returns:
-            List of BirdPrediction objects, sorted by confidence
+            List of BirdPrediction objects, sorted by confidence, and the
+            quality tier that produced them
 
         Raises:
+            ValueError: If the species list does not exist
             Exception: If image processing or inference fails
         """
+        # Admit the request before the executor hop, so the load monitor
+        # also sees requests queued for an executor thread
+        degraded = self.monitor.enter()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                None,
+                trace.call,
+                self._predict,
+                image_data,
+                threshold,
+                max_results,
+                trace,
+                species_list,
+                degraded,
+            )
+        finally:
+            self.monitor.leave()
+
+    def predict_sync(
+        self,
+        image_data: bytes,
+        threshold: float,
+        max_results: int,
+        trace: Union[Trace, NullTrace] = NULL_TRACE,
+        species_list: Optional[str] = None,
+    ) -> Tuple[List[BirdPrediction], QualityTier]:
+        """Process an image and return bird species predictions.
+
+        Blocks the calling thread until the prediction is done. Meant for
+        job worker threads; request handlers use :meth:`predict`.
+
+        Args:
+            image_data: Raw image bytes to process
+            threshold: Minimum confidence threshold (0-1)
+            max_results: Maximum number of predictions to return
+            trace: Trace recording the duration of each stage
+            species_list: Name of a species list to restrict results to
+
+        Returns:
+            List of BirdPrediction objects, sorted by confidence, and the
+            quality tier that produced them
+
+        Raises:
+            ValueError: If the species list does not exist
+            Exception: If image processing or inference fails
+        """
+        degraded = self.monitor.enter()
+        try:
+            return self._predict(
+                image_data,
+                threshold,
+                max_results,
+                trace,
+                species_list,
+                degraded,
+            )
+        finally:
+            self.monitor.leave()
+
+    def _predict(
+        self,
+        image_data: bytes,
+        threshold: float,
+        max_results: int,
+        trace: Union[Trace, NullTrace],
+        species_list: Optional[str],
+        degraded: bool,
+    ) -> Tuple[List[BirdPrediction], QualityTier]:
+        """Run a prediction admitted by the load monitor.
+
+        Args:
+            image_data: Raw image bytes to process
+            threshold: Minimum confidence threshold (0-1)
+            max_results: Maximum number of predictions to return
+            trace: Trace recording the duration of each stage
+            species_list: Name of a species list to restrict results to
+            degraded: Whether the monitor admitted the request as degraded
+
+        Returns:
+            List of BirdPrediction objects, sorted by confidence, and the
+            quality tier that produced them
+
+        Raises:
+            ValueError: If the species list does not exist
+            Exception: If image processing or inference fails
+        """
+        if species_list is None:
+            mask = self.species_filter.base_mask
+        else:
+            mask = self.species_filter.mask(species_list)
+
         # In development, return dummy predictions
-        if self.classifier is None:
+        if self.interpreter is None:
             print("Using development mode for predictions (random data)")
             import random
 
             predictions = []
-            species = random.sample(
-                self.DEV_BIRDS, min(max_results, len(self.DEV_BIRDS))
-            )
+            allowed = [
+                bird for bird, keep in zip(self.DEV_BIRDS, mask) if keep
+            ]
+            species = random.sample(allowed, min(max_results, len(allowed)))
             for scientific, common in species:
                 confidence = random.uniform(threshold, 1.0)
                 predictions.append(
@@ -149,53 +366,136 @@ class MLService:
                         scientific_name=scientific,
                     )
                 )
-            return sorted(
-                predictions, key=lambda x: x.confidence, reverse=True
-            )
+            predictions.sort(key=lambda x: x.confidence, reverse=True)
+            return predictions, QualityTier.FULL
 
         # Production prediction logic
         try:
-            # Preprocess image
-            processed_image = await self._preprocess_image(image_data)
+            tier = QualityTier.FULL
+            if self._reduced_pool is not None and degraded:
+                tier = QualityTier.REDUCED
 
-            print("Starting TFLite inference process...")
-            # Create TensorImage from numpy array
-            tensor_image = vision.TensorImage.create_from_array(
-                processed_image
-            )
-
-            # Run classification
-            print("Running classification...")
-            categories = self.classifier.classify(tensor_image)
-            print(
-                f"Got {len(categories.classifications[0].categories)} categories"
-            )
+            # Preprocess image
+            with trace.stage("decode"):
+                processed_image = self._preprocess_image(
+                    image_data, draft=tier == QualityTier.REDUCED
+                )
+                key = None
+                if self._reduced_pool is not None:
+                    key = self._cache_key(image_data, processed_image)
+
+            scores = None
+            if tier == QualityTier.REDUCED:
+                scores = self.score_cache.get(key)
+                if scores is not None:
+                    tier = QualityTier.CACHED
+
+            if scores is None:
+                print("Starting TFLite inference process...")
+                pool = self._full_pool
+                if tier == QualityTier.REDUCED:
+                    pool = self._reduced_pool
+                with trace.stage("inference"):
+                    scores = self._classify(processed_image, pool)
+                if key is not None:
+                    self.score_cache.put(key, scores)
 
             # Process results
-            results = []
-            for category in categories.classifications[0].categories:
-                print(
-                    f"Category: index={category.index}, score={category.score}"
-                )
-                if (
-                    category.score >= threshold and category.index != 964
-                ):  # 964 is background
+            with trace.stage("lookup"):
+                results = []
+                for index in top_predictions(
+                    scores, mask, threshold, max_results
+                ):
+                    scientific_name = self.scientific_names[index]
                     results.append(
                         BirdPrediction(
-                            species=get_common_name(category.display_name),
-                            confidence=float(category.score),
-                            scientific_name=category.display_name,
+                            species=get_common_name(scientific_name),
+                            confidence=float(scores[index]),
+                            scientific_name=scientific_name,
                         )
                     )
             print(f"Found {len(results)} results above threshold {threshold}")
 
-            # Sort by confidence and limit results
-            results.sort(key=lambda x: x.confidence, reverse=True)
-            return results[:max_results]
+            # Results are already sorted by confidence and limited
+            return results, tier
 
         except Exception as e:
             raise Exception(f"Error processing image: {str(e)}")
 
+    def _cache_key(
+        self, image_data: bytes, processed_image: np.ndarray
+    ) -> bytes:
+        """Key an image in the score cache.
+
+        Images are keyed by their exact content unless the cache matches
+        near-duplicates, in which case they are keyed by perceptual hash.
+
+        Args:
+            image_data: Raw image bytes
+            processed_image: Preprocessed image array (224x224x3 uint8)
+
+        Returns:
+            Cache key of the image
+        """
+        if self.score_cache.max_distance > 0:
+            return image_hash(processed_image)
+        return content_digest(image_data)
+
+    def _classify(
+        self, processed_image: np.ndarray, pool: queue.Queue
+    ) -> np.ndarray:
+        """Run inference on an interpreter taken from a pool.
+
+        Blocks until an interpreter is free. Inference times of the full
+        quality tier are recorded with the load monitor.
+
+        Args:
+            processed_image: Preprocessed image array (224x224x3 uint8)
+            pool: Queue of idle interpreters
+
+        Returns:
+            Score of each model output class, by index
+        """
+        interpreter = pool.get()
+        try:
+            print("Running classification...")
+            start = time.perf_counter()
+            scores = self._invoke(interpreter, processed_image)
+            if pool is self._full_pool:
+                self.monitor.record(time.perf_counter() - start)
+            return scores
+        finally:
+            pool.put(interpreter)
+
+    @staticmethod
+    def _invoke(
+        interpreter: Interpreter, processed_image: np.ndarray
+    ) -> np.ndarray:
+        """Run the model and read the scores off its output tensor.
+
+        tflite_runtime's quantized kernels round slightly differently from
+        the tflite_support Task API this service used before, so scores
+        can differ from it by a few 1/256 quantization steps.
+
+        Args:
+            interpreter: Interpreter to run, not shared with other threads
+            processed_image: Preprocessed image array (224x224x3 uint8)
+
+        Returns:
+            Score of each model output class, by index
+        """
+        input_details = interpreter.get_input_details()[0]
+        output_details = interpreter.get_output_details()[0]
+        interpreter.set_tensor(input_details["index"], processed_image[None])
+        interpreter.invoke()
+        output = interpreter.get_tensor(output_details["index"])[0]
+
+        # Dequantize the uint8 scores
+        scale, zero_point = output_details["quantization"]
+        if scale:
+            return (output.astype(np.float32) - zero_point) * scale
+        return output.astype(np.float32)
+
     # Common development birds
     DEV_BIRDS = [
         ("Cardinalis cardinalis", "Northern Cardinal"),
@@ -211,7 +511,7 @@ class MLService:
         Returns:
             List of bird species names that can be identified by the model
         """
-        if self.classifier is None:
+        if self.interpreter is None:
             # In development mode, return our test species
             return [common for _, common in self.DEV_BIRDS]
 
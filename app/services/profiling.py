@@ -0,0 +1,265 @@
+"""Per-request profiling for the identification pipeline.
+
+This module records how long each stage of a request takes (upload, image
+decoding, TFLite inference, name lookups), optionally together with a
+cProfile capture, and dumps the traces to disk for offline analysis.
+Requests that are not traced get a shared no-op trace, so the hooks cost
+next to nothing when profiling is off. Inference is timed as a whole: the
+tflite_runtime Python interpreter exposes no per-op timings, so op-level
+breakdowns need TFLite's ``benchmark_model`` tool with
+``--enable_op_profiling``.
+
+Only one request at a time gets a cProfile capture; traces started while
+another capture runs record stage timings only. A capture covers the
+event-loop thread while the request is in flight, which includes any
+other requests' coroutines that run meanwhile, plus the executor-side
+work the request hands to :meth:`Trace.call`, which is its own.
+"""
+
+import cProfile
+import glob
+import json
+import os
+import pstats
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+from typing import (
+    Any,
+    Callable,
+    ContextManager,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Union,
+)
+
+_NULL_STAGE = nullcontext()
+
+# Held by the one trace currently running a cProfile capture
+_CPROFILE_LOCK = threading.Lock()
+
+
+class NullTrace:
+    """Trace used for requests that are not profiled."""
+
+    trace_id: Optional[str] = None
+
+    def stage(self, name: str) -> ContextManager:
+        """Return a reusable context manager that records nothing."""
+        return _NULL_STAGE
+
+    def call(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Call ``func`` with ``args``."""
+        return func(*args)
+
+
+NULL_TRACE = NullTrace()
+
+
+class Trace:
+    """Stage timings, and optionally a cProfile capture, of one request.
+
+    Attributes:
+        trace_id: Unique identifier of the trace
+        stages: List of (stage name, duration in seconds) tuples
+        profile: cProfile profile of the request, if it got a capture
+    """
+
+    def __init__(self, use_cprofile: bool = False):
+        """Start a new trace.
+
+        Args:
+            use_cprofile: Whether to run cProfile for the traced request,
+                skipped if another request is already being profiled
+        """
+        self.trace_id = uuid.uuid4().hex
+        self.started_at = time.time()
+        self.stages: List[tuple] = []
+        self.total = 0.0
+        self.profile: Optional[cProfile.Profile] = None
+        self._thread_profiles: List[cProfile.Profile] = []
+        self._start = time.perf_counter()
+        if use_cprofile and _CPROFILE_LOCK.acquire(blocking=False):
+            try:
+                self.profile = cProfile.Profile()
+                self.profile.enable()
+            except ValueError:
+                # Another profiling tool is active (Python 3.12+)
+                self.profile = None
+                _CPROFILE_LOCK.release()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Time the enclosed block as the stage ``name``."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages.append((name, time.perf_counter() - start))
+
+    def call(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Call ``func`` with ``args``, profiling it on the calling thread.
+
+        Before Python 3.12 cProfile only sees the thread that enabled it,
+        so work handed to an executor thread is profiled with a separate
+        profile that is merged into the dump.
+        """
+        if self.profile is None:
+            return func(*args)
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Python 3.12+ profiles every thread with the request's profile
+            return func(*args)
+        try:
+            return func(*args)
+        finally:
+            profile.disable()
+            self._thread_profiles.append(profile)
+
+    def stop(self):
+        """Stop the trace and its cProfile capture."""
+        self.total = time.perf_counter() - self._start
+        if self.profile is not None:
+            self.profile.disable()
+            _CPROFILE_LOCK.release()
+
+    def stats(self) -> Optional[pstats.Stats]:
+        """Get the combined cProfile statistics of the trace, if any."""
+        if self.profile is None:
+            return None
+        stats = pstats.Stats(self.profile)
+        for profile in self._thread_profiles:
+            stats.add(profile)
+        return stats
+
+    def server_timing(self) -> str:
+        """Format the stage timings as a ``Server-Timing`` header value."""
+        entries = [
+            f"{name};dur={duration * 1000:.3f}"
+            for name, duration in self.stages
+        ]
+        entries.append(f"total;dur={self.total * 1000:.3f}")
+        return ", ".join(entries)
+
+    def to_dict(self) -> Dict:
+        """Serialize the trace for dumping."""
+        return {
+            "trace_id": self.trace_id,
+            "started_at": self.started_at,
+            "total": self.total,
+            "stages": [
+                {"name": name, "duration": duration}
+                for name, duration in self.stages
+            ],
+        }
+
+
+class Profiler:
+    """Decides which requests are traced and stores finished traces.
+
+    A request is traced when it is picked by sampling ``sample_rate`` of
+    the traffic, or when the client asks for it and ``allow_force`` is
+    set. Each finished trace is written to ``dump_dir`` as
+    ``<trace_id>.json``, together with ``<trace_id>.prof`` (loadable with
+    :mod:`pstats`) if cProfile is on. Traces are written by a background
+    thread, which keeps only the newest ``max_traces`` of them.
+    """
+
+    def __init__(
+        self,
+        sample_rate: float = 0.0,
+        use_cprofile: bool = False,
+        dump_dir: str = "traces",
+        allow_force: bool = False,
+        max_traces: int = 100,
+    ):
+        """Configure the profiler.
+
+        Args:
+            sample_rate: Fraction of requests to trace (0-1)
+            use_cprofile: Whether traces include a cProfile capture
+            dump_dir: Directory the traces are written to
+            allow_force: Whether clients may ask for their request to be
+                traced
+            max_traces: Number of traces kept in the dump directory
+        """
+        self.sample_rate = sample_rate
+        self.use_cprofile = use_cprofile
+        self.dump_dir = dump_dir
+        self.allow_force = allow_force
+        self.max_traces = max_traces
+        self._writer: Optional[ThreadPoolExecutor] = None
+        self._writer_lock = threading.Lock()
+
+    def start(self, force: bool = False) -> Union[Trace, NullTrace]:
+        """Begin tracing a request if it is requested or sampled.
+
+        Args:
+            force: Trace the request regardless of sampling, if the
+                profiler allows clients to force traces
+
+        Returns:
+            A new Trace, or NULL_TRACE if the request is not traced
+        """
+        if not (force and self.allow_force) and (
+            self.sample_rate <= 0.0 or random.random() >= self.sample_rate
+        ):
+            return NULL_TRACE
+        return Trace(use_cprofile=self.use_cprofile)
+
+    def finish(self, trace: Union[Trace, NullTrace]) -> Optional[Future]:
+        """Stop a trace and queue it to be written to the dump directory.
+
+        Args:
+            trace: Trace returned by :meth:`start`
+
+        Returns:
+            Future of the write, or None if the request was not traced
+        """
+        if isinstance(trace, NullTrace):
+            return None
+        trace.stop()
+        with self._writer_lock:
+            if self._writer is None:
+                self._writer = ThreadPoolExecutor(
+                    max_workers=1, thread_name_prefix="trace-writer"
+                )
+        return self._writer.submit(self._dump, trace)
+
+    def flush(self):
+        """Wait until all queued traces are written."""
+        if self._writer is not None:
+            self._writer.submit(lambda: None).result()
+
+    def _dump(self, trace: Trace):
+        """Write a trace and drop the oldest traces over the limit."""
+        try:
+            os.makedirs(self.dump_dir, exist_ok=True)
+            path = os.path.join(self.dump_dir, trace.trace_id)
+            with open(f"{path}.json", "w") as f:
+                json.dump(trace.to_dict(), f)
+            stats = trace.stats()
+            if stats is not None:
+                stats.dump_stats(f"{path}.prof")
+            self._rotate()
+        except OSError as e:
+            print(f"Error writing trace {trace.trace_id}: {str(e)}")
+
+    def _rotate(self):
+        """Delete the oldest traces beyond ``max_traces``."""
+        traces = sorted(
+            glob.glob(os.path.join(self.dump_dir, "*.json")),
+            key=lambda path: os.stat(path).st_mtime_ns,
+        )
+        for json_path in traces[: max(0, len(traces) - self.max_traces)]:
+            base = json_path[: -len(".json")]
+            for extension in (".json", ".prof"):
+                if os.path.exists(base + extension):
+                    os.remove(base + extension)
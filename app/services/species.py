@@ -0,0 +1,152 @@
+"""Species lists and precomputed class masks for filtering predictions.
+
+This module compiles regional or custom species lists into boolean masks
+over the model's output classes, so predictions can be restricted to the
+species of a list by masking the score vector before picking the top
+results.
+"""
+
+import os
+from typing import Dict, Iterable, List, Sequence
+
+import numpy as np
+
+from app.queries import get_scientific_names
+
+
+class SpeciesFilter:
+    """Compiles species lists into cached boolean class masks.
+
+    A species list is a text file ``<name>.txt`` in ``lists_dir`` with one
+    scientific or common name per line; common names are resolved through
+    the birdnames database. Blank lines and lines starting with ``#`` are
+    ignored. The directory is scanned once, when the filter is created, and
+    each list is compiled once, on first use, and then cached.
+    """
+
+    def __init__(
+        self,
+        labels: Sequence[str],
+        lists_dir: str,
+        excluded: Iterable[int] = (),
+    ):
+        """Set up the filter for a model.
+
+        Args:
+            labels: Scientific name of each model output class, by index
+            lists_dir: Directory containing the species list files
+            excluded: Output indices never returned (e.g. background)
+        """
+        self.labels = np.array(labels, dtype=object)
+        self.lists_dir = lists_dir
+        self.base_mask = np.ones(len(self.labels), dtype=bool)
+        self.base_mask[list(excluded)] = False
+        self._masks: Dict[str, np.ndarray] = {}
+        self._names: List[str] = []
+        if os.path.isdir(lists_dir):
+            self._names = sorted(
+                filename[:-4]
+                for filename in os.listdir(lists_dir)
+                if filename.endswith(".txt")
+            )
+        self._known = frozenset(self._names)
+
+    def available(self) -> List[str]:
+        """Get the names of all species lists.
+
+        Returns:
+            Sorted list of species list names
+        """
+        return list(self._names)
+
+    def exists(self, name: str) -> bool:
+        """Check whether a species list with this name exists."""
+        return name in self._known
+
+    def mask(self, name: str) -> np.ndarray:
+        """Get the class mask of a species list.
+
+        Args:
+            name: Name of the species list
+
+        Returns:
+            Read-only boolean array, True for classes in the list
+
+        Raises:
+            ValueError: If no species list with this name exists
+        """
+        mask = self._masks.get(name)
+        if mask is None:
+            if not self.exists(name):
+                raise ValueError(f"Unknown species list: {name}")
+            mask = self.compile(self._read_list(name))
+            mask.flags.writeable = False
+            self._masks[name] = mask
+        return mask
+
+    def compile(self, names: Iterable[str]) -> np.ndarray:
+        """Compile species names into a class mask.
+
+        Names matching no model class, directly or through their common
+        name, are logged and left out of the mask.
+
+        Args:
+            names: Scientific or common names of the species to keep
+
+        Returns:
+            Boolean array, True for classes of the given species
+
+        Raises:
+            sqlite3.Error: If common names cannot be looked up
+        """
+        names = set(names)
+        known = set(self.labels.tolist())
+        common = sorted(names - known)
+        scientific = names & known
+        resolved = get_scientific_names(common)
+        scientific.update(resolved.values())
+
+        unmatched = [
+            name
+            for name in common
+            if name not in resolved or resolved[name] not in known
+        ]
+        if unmatched:
+            print(
+                f"Species list names matching no model class: "
+                f"{', '.join(unmatched)}"
+            )
+        return np.isin(self.labels, list(scientific)) & self.base_mask
+
+    def _read_list(self, name: str) -> List[str]:
+        """Read the species names from a list file."""
+        path = os.path.join(self.lists_dir, f"{name}.txt")
+        with open(path) as f:
+            lines = (line.strip() for line in f)
+            return [
+                line for line in lines if line and not line.startswith("#")
+            ]
+
+
+def top_predictions(
+    scores: np.ndarray,
+    mask: np.ndarray,
+    threshold: float,
+    max_results: int,
+) -> np.ndarray:
+    """Select the best scoring classes allowed by a mask.
+
+    Args:
+        scores: Score of each model output class, by index
+        mask: Boolean array of the classes that may be returned
+        threshold: Minimum score of a returned class
+        max_results: Maximum number of classes to return
+
+    Returns:
+        Indices of the selected classes, sorted by descending score
+    """
+    candidates = np.flatnonzero(mask & (scores >= threshold))
+    if len(candidates) > max_results:
+        best = np.argpartition(-scores[candidates], max_results - 1)
+        candidates = candidates[best[:max_results]]
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
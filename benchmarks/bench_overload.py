@@ -0,0 +1,139 @@
+"""Load test of MLService with and without adaptive quality.
+
+Drives the service with an increasing number of concurrent clients, each
+sending images back to back, and reports throughput, tail latency and the
+quality tiers served. Concurrency 1 is the saturation point of the full
+quality path: every additional client only adds queueing there.
+
+Three configurations are compared:
+
+- ``off``: adaptive quality disabled, every request on the full path
+- ``reduced``: adaptive quality with the score cache disabled and every
+  image distinct, so degraded requests all run on the reduced path
+- ``cached``: adaptive quality with the score cache and a small set of
+  repeated images, like consecutive feeder frames; results are also
+  broken down by tier so cache hits are reported apart from inference
+
+Each configuration is driven twice: through the async ``predict``, on the
+default executor like ``/identify`` requests, and through
+``predict_sync`` from one thread per client like job workers.
+
+Usage:
+    python -m benchmarks.bench_overload
+"""
+
+import asyncio
+import io
+import os
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+import numpy as np
+from PIL import Image, ImageEnhance
+
+from app.config import settings
+from app.services.ml import MLService
+
+IMAGE_PATH = os.path.join("tests", "assets", "test_bird.jpg")
+CONCURRENCY = [1, 4, 8]
+REQUESTS_PER_LEVEL = 200
+REPEATED_IMAGES = 16
+
+
+def make_images(count: int) -> List[bytes]:
+    """Create distinct JPEG variants of the test image."""
+    base = Image.open(IMAGE_PATH).convert("RGB")
+    width, height = base.size
+    images = []
+    for i in range(count):
+        crop = (i % 16) * width // 64
+        variant = base.crop((crop, crop, width - crop, height - crop))
+        variant = ImageEnhance.Brightness(variant).enhance(0.8 + 0.002 * i)
+        buffer = io.BytesIO()
+        variant.save(buffer, format="JPEG", quality=90)
+        images.append(buffer.getvalue())
+    return images
+
+
+def run_level(
+    service: MLService, images: List[bytes], clients: int, served: bool
+):
+    """Run one load level and return latencies by tier and wall time."""
+    latencies: Dict[str, List[float]] = defaultdict(list)
+
+    async def served_client(offset: int):
+        for i in range(offset, REQUESTS_PER_LEVEL, clients):
+            start = time.perf_counter()
+            _, tier = await service.predict(images[i % len(images)], 0.0, 3)
+            latencies[tier.value].append(time.perf_counter() - start)
+
+    async def served_clients():
+        await asyncio.gather(*(served_client(i) for i in range(clients)))
+
+    def thread_client(offset: int):
+        for i in range(offset, REQUESTS_PER_LEVEL, clients):
+            start = time.perf_counter()
+            _, tier = service.predict_sync(images[i % len(images)], 0.0, 3)
+            latencies[tier.value].append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    if served:
+        asyncio.run(served_clients())
+    else:
+        with ThreadPoolExecutor(max_workers=clients) as executor:
+            list(executor.map(thread_client, range(clients)))
+    return latencies, time.perf_counter() - start
+
+
+def report(label: str, latencies: List[float], elapsed: float):
+    """Print throughput and latency percentiles of a set of requests."""
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    print(
+        f"{label:>10}  {len(latencies):>5}  {len(latencies) / elapsed:6.2f}"
+        f"  {p50:7.3f}  {p95:7.3f}  {p99:7.3f}"
+    )
+
+
+def benchmark(
+    name: str, adaptive: bool, cache_size: int, images, served: bool
+):
+    """Print the load test results for one service configuration."""
+    settings.ADAPTIVE_ENABLED = adaptive
+    settings.ADAPTIVE_CACHE_SIZE = cache_size
+    path = "predict (/identify)" if served else "predict_sync (jobs)"
+    print(f"\n{name}, {path}")
+    print("   clients   reqs   req/s  p50 (s)  p95 (s)  p99 (s)")
+    for clients in CONCURRENCY:
+        # A fresh service per level, so no level starts with a warm cache
+        service = MLService()
+        warm_up = Image.new("RGB", (224, 224))
+        buffer = io.BytesIO()
+        warm_up.save(buffer, format="JPEG")
+        service.predict_sync(buffer.getvalue(), 0.0, 3)
+
+        latencies, elapsed = run_level(service, images, clients, served)
+        report(
+            str(clients),
+            [latency for tier in latencies.values() for latency in tier],
+            elapsed,
+        )
+        if len(latencies) > 1:
+            for tier, tier_latencies in sorted(latencies.items()):
+                report(tier, tier_latencies, elapsed)
+
+
+def main():
+    """Compare the service with adaptive quality off and on."""
+    cache_size = settings.ADAPTIVE_CACHE_SIZE
+    distinct = make_images(REQUESTS_PER_LEVEL)
+    repeated = distinct[:REPEATED_IMAGES]
+    for served in (True, False):
+        benchmark("off", False, 0, distinct, served)
+        benchmark("reduced (cache off)", True, 0, distinct, served)
+        benchmark("cached", True, cache_size, repeated, served)
+
+
+if __name__ == "__main__":
+    main()
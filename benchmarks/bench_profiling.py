@@ -0,0 +1,70 @@
+"""Benchmark the overhead of the profiling hooks when tracing is disabled.
+
+Runs the identification pipeline on the test image with the no-op trace
+and compares the cost of the stage hooks a request passes through against
+the time of a full prediction.
+
+Usage:
+    python -m benchmarks.bench_profiling
+"""
+
+import asyncio
+import os
+import time
+import timeit
+
+from app.services.ml import MLService
+from app.services.profiling import NULL_TRACE, Profiler
+
+IMAGE_PATH = os.path.join("tests", "assets", "test_bird.jpg")
+HOOK_CALLS = 1_000_000
+PREDICT_CALLS = 50
+
+
+def hook_overhead() -> float:
+    """Return the cost in seconds of one disabled request's hooks."""
+    profiler = Profiler(sample_rate=0.0)
+
+    def request_hooks():
+        trace = profiler.start()
+        for name in ("read", "decode", "inference", "lookup"):
+            with trace.stage(name):
+                pass
+        profiler.finish(trace)
+
+    def bare_loop():
+        for name in ("read", "decode", "inference", "lookup"):
+            pass
+
+    hooks = timeit.timeit(request_hooks, number=HOOK_CALLS)
+    bare = timeit.timeit(bare_loop, number=HOOK_CALLS)
+    return (hooks - bare) / HOOK_CALLS
+
+
+def predict_time() -> float:
+    """Return the mean time in seconds of a prediction without tracing."""
+    service = MLService()
+    with open(IMAGE_PATH, "rb") as f:
+        image_data = f.read()
+
+    async def run():
+        await service.predict(image_data, 0.0, 3, trace=NULL_TRACE)
+
+    asyncio.run(run())  # Warm up
+    start = time.perf_counter()
+    for _ in range(PREDICT_CALLS):
+        asyncio.run(run())
+    return (time.perf_counter() - start) / PREDICT_CALLS
+
+
+def main():
+    """Print the disabled-hook overhead relative to a prediction."""
+    overhead = hook_overhead()
+    predict = predict_time()
+    print(f"Disabled hooks per request: {overhead * 1e6:.3f} us")
+    print(f"Prediction per request:     {predict * 1e3:.3f} ms")
+    print(f"Relative overhead:          {overhead / predict:.6%}")
+
+
+if __name__ == "__main__":
+    main()
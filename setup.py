@@ -16,6 +16,7 @@ setup(
         "pillow==9.5.0",
         "numpy==1.24.3",
         "tflite-support==0.4.3",
+        "tflite-runtime==2.14.0",
         "python-dotenv>=1.0.0",
         "pydantic>=2.4.2",
         "pydantic-settings>=2.0.3",
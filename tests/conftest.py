@@ -0,0 +1,25 @@
+"""Shared fixtures and configuration for the test suite.
+
+Job and trace files are redirected to a temporary directory before the
+application is imported, so tests never touch the repository's data.
+"""
+
+import io
+import os
+import tempfile
+
+import pytest
+from PIL import Image
+
+_TEST_DATA_DIR = tempfile.mkdtemp(prefix="birdidentifier-tests-")
+os.environ["JOB_DB_PATH"] = os.path.join(_TEST_DATA_DIR, "jobs.db")
+os.environ["PROFILING_DUMP_DIR"] = os.path.join(_TEST_DATA_DIR, "traces")
+
+
+@pytest.fixture
+def sample_image():
+    """Create a sample image for testing."""
+    img = Image.new("RGB", (224, 224), color="red")
+    img_byte_arr = io.BytesIO()
+    img.save(img_byte_arr, format="PNG")
+    return img_byte_arr.getvalue()
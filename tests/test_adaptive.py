@@ -0,0 +1,221 @@
+"""Tests for adaptive quality under overload.
+
+This module tests the load monitor, the score cache and the quality tiers
+served by the ML service.
+"""
+
+import asyncio
+import io
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from PIL import Image
+
+from app.config import settings
+from app.main import app
+from app.schemas.bird import QualityTier
+from app.services.adaptive import LoadMonitor, ScoreCache, image_hash
+from app.services.ml import MLService
+
+client = TestClient(app)
+
+
+def jpeg(image, quality=90):
+    """Encode an image as JPEG bytes."""
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=quality)
+    return buffer.getvalue()
+
+
+def distance(a, b):
+    """Count the differing bits of two hashes."""
+    return bin(int.from_bytes(a, "big") ^ int.from_bytes(b, "big")).count("1")
+
+
+@pytest.fixture
+def bird_image():
+    """Load the test bird image."""
+    return Image.open("tests/assets/test_bird.jpg").convert("RGB")
+
+
+def test_load_monitor_hysteresis():
+    """Test that degraded mode starts above and ends below the threshold."""
+    monitor = LoadMonitor(threshold=1.0, capacity=1, smoothing=1.0)
+    monitor.record(0.5)
+    assert [monitor.enter() for _ in range(4)] == [False, False, False, True]
+    monitor.leave()
+    monitor.leave()
+    assert monitor.enter()
+    for _ in range(3):
+        monitor.leave()
+    assert not monitor.enter()
+
+
+def test_load_monitor_tracks_full_quality_time():
+    """Test that the estimate follows the full-quality inference time."""
+    monitor = LoadMonitor(threshold=1.0, capacity=2, smoothing=0.5)
+    monitor.record(1.0)
+    monitor.record(2.0)
+    assert monitor.service_time == 1.5
+    for _ in range(4):
+        monitor.enter()
+    assert monitor.queue_latency == 1.5 * 2 / 2
+
+
+def test_score_cache_evicts_least_recently_used():
+    """Test that the cache keeps the most recently used entries."""
+    cache = ScoreCache(size=2)
+    cache.put(b"a", np.zeros(3))
+    cache.put(b"b", np.ones(3))
+    assert cache.get(b"a") is not None
+    cache.put(b"c", np.ones(3))
+    assert cache.get(b"b") is None
+    assert cache.get(b"a") is not None
+    assert cache.get(b"c") is not None
+
+
+def test_score_cache_matches_near_hashes():
+    """Test that hashes differing in a few bits share an entry."""
+    cache = ScoreCache(size=2, max_distance=2)
+    cache.put(bytes([0b00000000, 0]), np.ones(3))
+    assert cache.get(bytes([0b00000011, 0])) is not None
+    assert cache.get(bytes([0b00000111, 0])) is None
+
+
+def test_image_hash_matches_near_duplicates(bird_image):
+    """Test that re-encoded copies share a hash and other images do not."""
+    small = np.array(bird_image.resize((224, 224)), dtype=np.uint8)
+    reencoded = Image.open(io.BytesIO(jpeg(bird_image.resize((224, 224)), 60)))
+    a, b = image_hash(small), image_hash(np.array(reencoded))
+    assert distance(a, b) <= 8
+    assert distance(a, image_hash(small[::-1])) > 32
+
+
+def feeder_photo(bird_image, box):
+    """Photograph part of the bird in front of a fixed background."""
+    photo = Image.new("RGB", (640, 480), (90, 140, 200))
+    photo.paste(bird_image.crop(box).resize((48, 48)), (296, 216))
+    return jpeg(photo)
+
+
+def test_cache_misses_other_birds_on_same_background(bird_image, monkeypatch):
+    """Test that different content on the same background is not cached."""
+    monkeypatch.setattr(settings, "ADAPTIVE_ENABLED", True)
+    monkeypatch.setattr(settings, "ADAPTIVE_REDUCED_INTERPRETERS", 1)
+    service = MLService()
+    if service.interpreter is None:
+        pytest.skip("Model not available")
+
+    first = feeder_photo(bird_image, (0, 0, 320, 240))
+    second = feeder_photo(bird_image, (320, 240, 640, 480))
+    expected = [
+        (first, QualityTier.REDUCED),
+        (second, QualityTier.REDUCED),
+        (first, QualityTier.CACHED),
+    ]
+    monkeypatch.setattr(service.monitor, "enter", lambda: True)
+    for image_data, tier in expected:
+        assert asyncio.run(service.predict(image_data, 0.0, 3))[1] == tier
+
+
+def test_degraded_service_tiers(bird_image, monkeypatch):
+    """Test that a degraded service serves reduced, then cached results."""
+    monkeypatch.setattr(settings, "ADAPTIVE_ENABLED", True)
+    monkeypatch.setattr(settings, "ADAPTIVE_REDUCED_INTERPRETERS", 1)
+    service = MLService()
+    if service.interpreter is None:
+        pytest.skip("Model not available")
+
+    image_data = jpeg(bird_image)
+    monkeypatch.setattr(service.monitor, "enter", lambda: True)
+    reduced, tier = asyncio.run(service.predict(image_data, 0.0, 3))
+    assert tier == QualityTier.REDUCED
+
+    cached, tier = asyncio.run(service.predict(image_data, 0.0, 3))
+    assert tier == QualityTier.CACHED
+    assert cached == reduced
+
+    monkeypatch.setattr(service.monitor, "enter", lambda: False)
+    full, tier = asyncio.run(service.predict(image_data, 0.0, 3))
+    assert tier == QualityTier.FULL
+    assert full[0].scientific_name == reduced[0].scientific_name
+
+
+def test_requests_count_while_queued_for_executor():
+    """Test that requests waiting for an executor thread count as load."""
+    service = MLService()
+    release = threading.Event()
+
+    def blocked_predict(*args):
+        release.wait()
+        return [], QualityTier.FULL
+
+    service._predict = blocked_predict
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        loop.set_default_executor(ThreadPoolExecutor(max_workers=1))
+        tasks = [
+            asyncio.create_task(service.predict(b"image", 0.0, 1))
+            for _ in range(3)
+        ]
+        await asyncio.sleep(0.05)
+        in_flight = service.monitor.in_flight
+        release.set()
+        await asyncio.gather(*tasks)
+        return in_flight
+
+    assert asyncio.run(run()) == 3
+    assert service.monitor.in_flight == 0
+
+
+def test_steady_overload_stays_degraded(monkeypatch):
+    """Test that serving cheaper results does not end degraded mode."""
+    monkeypatch.setattr(settings, "ADAPTIVE_ENABLED", True)
+    monkeypatch.setattr(settings, "ADAPTIVE_LATENCY_THRESHOLD", 0.15)
+    service = MLService()
+    if service.interpreter is None:
+        pytest.skip("Model not available")
+
+    scores = np.linspace(0.0, 1.0, len(service.scientific_names))
+
+    def slow_invoke(interpreter, processed_image):
+        time.sleep(0.1)
+        return scores.astype(np.float32)
+
+    def image(index):
+        buffer = io.BytesIO()
+        Image.new("RGB", (64, 64), (index, 0, 0)).save(buffer, format="PNG")
+        return buffer.getvalue()
+
+    monkeypatch.setattr(service, "_invoke", slow_invoke)
+    assert service.predict_sync(image(0), 0.0, 1)[1] == QualityTier.FULL
+
+    # Four clients keep the single full-quality interpreter overloaded
+    clients = 4
+    start = threading.Barrier(clients)
+
+    def client(offset):
+        start.wait()
+        return [
+            service.predict_sync(image(1 + offset * 10 + i), 0.0, 1)[1]
+            for i in range(10)
+        ]
+
+    with ThreadPoolExecutor(max_workers=clients) as executor:
+        tiers = list(executor.map(client, range(clients)))
+    for client_tiers in tiers:
+        assert client_tiers[2:8] == [QualityTier.REDUCED] * 6
+
+
+def test_identify_reports_quality_tier(bird_image):
+    """Test that responses are tagged with their quality tier."""
+    files = {"image": ("bird.jpg", jpeg(bird_image), "image/jpeg")}
+    params = {"threshold": 0.5, "max_results": 3}
+    response = client.post("/api/v1/identify", files=files, params=params)
+    assert response.status_code == 200
+    assert response.json()["quality_tier"] == "full"
@@ -96,3 +96,14 @@ def test_identify_with_parameters(sample_image):
     assert len(predictions) <= 2
     if predictions:
         assert all(pred["confidence"] >= 0.8 for pred in predictions)
+
+
+def test_identify_odd_sized_image():
+    """Test identification of an image padded unevenly to model size."""
+    img = Image.new("RGB", (300, 199), color="green")
+    img_byte_arr = io.BytesIO()
+    img.save(img_byte_arr, format="PNG")
+    files = {"image": ("test.png", img_byte_arr.getvalue(), "image/png")}
+    params = {"threshold": 0.5, "max_results": 3}
+    response = client.post("/api/v1/identify", files=files, params=params)
+    assert response.status_code == 200
@@ -0,0 +1,221 @@
+"""Tests for the asynchronous identification job subsystem.
+
+This module tests the SQLite-backed job queue, the background worker pool
+and the job submission and polling endpoints.
+"""
+
+import sqlite3
+import time
+
+from fastapi.testclient import TestClient
+
+from app.api.v1 import router
+from app.main import app
+from app.schemas.bird import BirdPrediction, QualityTier
+from app.schemas.job import JobStatus
+from app.services.jobs import JobQueue, JobWorkerPool
+
+
+class FakeService:
+    """Stand-in for MLService returning a fixed prediction."""
+
+    def predict_sync(
+        self, image_data, threshold, max_results, species_list=None
+    ):
+        if image_data == b"broken":
+            raise Exception("cannot identify image file")
+        predictions = [
+            BirdPrediction(
+                species="Blue Jay",
+                confidence=0.9,
+                scientific_name="Cyanocitta cristata",
+            )
+        ]
+        return predictions[:max_results], QualityTier.FULL
+
+
+def wait_for_job(get_job, job_id, timeout=10.0):
+    """Poll a job until it reaches a terminal state."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = get_job(job_id)
+        if job.status in (JobStatus.COMPLETED, JobStatus.FAILED):
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"Job {job_id} did not finish in time")
+
+
+def test_queue_is_persistent(tmp_path):
+    """Test that submitted jobs survive reopening the database."""
+    db_path = str(tmp_path / "jobs.db")
+    job_id = JobQueue(db_path).submit(b"image", 0.5, 3)
+
+    reopened = JobQueue(db_path)
+    assert reopened.get(job_id).status == JobStatus.PENDING
+    job = reopened.claim()
+    assert job["id"] == job_id
+    assert job["image"] == b"image"
+    assert reopened.claim() is None
+
+
+def test_expired_lease_is_reclaimed(tmp_path):
+    """Test that jobs of a crashed worker are handed out again."""
+    queue = JobQueue(str(tmp_path / "jobs.db"), lease_seconds=0.0)
+    job_id = queue.submit(b"image", 0.5, 3)
+
+    assert queue.claim()["id"] == job_id
+    time.sleep(0.01)
+    assert queue.claim()["id"] == job_id
+
+
+def test_job_fails_after_max_attempts(tmp_path):
+    """Test that a job which keeps crashing workers is given up on."""
+    queue = JobQueue(
+        str(tmp_path / "jobs.db"), lease_seconds=0.0, max_attempts=1
+    )
+    job_id = queue.submit(b"image", 0.5, 3)
+
+    assert queue.claim()["id"] == job_id
+    time.sleep(0.01)
+    assert queue.claim() is None
+    assert queue.get(job_id).status == JobStatus.FAILED
+
+
+def test_expired_jobs_are_purged(tmp_path):
+    """Test that finished jobs are deleted after the retention period."""
+    queue = JobQueue(str(tmp_path / "jobs.db"), retention_seconds=0.05)
+    done_id = queue.submit(b"image", 0.5, 3)
+    pending_id = queue.submit(b"image", 0.5, 3)
+    queue.fail(queue.claim()["id"], "cannot identify image file")
+
+    assert queue.purge() == 0
+    time.sleep(0.1)
+    assert queue.purge() == 1
+    assert queue.get(done_id) is None
+    assert queue.get(pending_id).status == JobStatus.PENDING
+
+
+def test_worker_pool_processes_jobs(tmp_path):
+    """Test that workers complete good jobs and record failures."""
+    queue = JobQueue(str(tmp_path / "jobs.db"))
+    ok_id = queue.submit(b"image", 0.5, 1)
+    broken_id = queue.submit(b"broken", 0.5, 1)
+
+    pool = JobWorkerPool(
+        queue, size=2, poll_interval=0.05, service_factory=FakeService
+    )
+    pool.start()
+    try:
+        ok = wait_for_job(queue.get, ok_id)
+        broken = wait_for_job(queue.get, broken_id)
+    finally:
+        pool.stop()
+
+    assert ok.status == JobStatus.COMPLETED
+    assert ok.result.predictions[0].species == "Blue Jay"
+    assert broken.status == JobStatus.FAILED
+    assert "cannot identify image file" in broken.error
+
+
+def test_worker_survives_service_errors(tmp_path):
+    """Test that workers retry creating their service and report health."""
+    queue = JobQueue(str(tmp_path / "jobs.db"))
+    job_id = queue.submit(b"image", 0.5, 1)
+    attempts = []
+
+    def flaky_factory():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise Exception("Failed to load model")
+        return FakeService()
+
+    pool = JobWorkerPool(
+        queue,
+        size=1,
+        poll_interval=0.05,
+        service_factory=flaky_factory,
+        retry_interval=0.05,
+    )
+    pool.start()
+    try:
+        assert not pool.healthy()
+        job = wait_for_job(queue.get, job_id)
+        assert pool.healthy()
+    finally:
+        pool.stop()
+
+    assert job.status == JobStatus.COMPLETED
+    assert len(attempts) == 3
+
+
+def test_worker_survives_queue_errors(tmp_path, monkeypatch):
+    """Test that a failure to store a result does not kill the worker."""
+    queue = JobQueue(str(tmp_path / "jobs.db"))
+    first_id = queue.submit(b"image", 0.5, 1)
+    second_id = queue.submit(b"image", 0.5, 1)
+    complete = queue.complete
+    locked = [first_id]
+
+    def locked_complete(job_id, response):
+        if locked:
+            raise sqlite3.OperationalError("database is locked")
+        complete(job_id, response)
+
+    def locked_fail(job_id, error):
+        locked.clear()
+        raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(queue, "complete", locked_complete)
+    monkeypatch.setattr(queue, "fail", locked_fail)
+    pool = JobWorkerPool(
+        queue,
+        size=1,
+        poll_interval=0.05,
+        service_factory=FakeService,
+        retry_interval=0.05,
+    )
+    pool.start()
+    try:
+        second = wait_for_job(queue.get, second_id)
+        assert pool.healthy()
+    finally:
+        pool.stop()
+
+    assert queue.get(first_id).status == JobStatus.RUNNING
+    assert second.status == JobStatus.COMPLETED
+
+
+def test_job_endpoints(sample_image):
+    """Test submitting a job and polling it until it completes."""
+    with TestClient(app) as client:
+        files = {"image": ("test.png", sample_image, "image/png")}
+        params = {"threshold": 0.5, "max_results": 3}
+        response = client.post("/api/v1/jobs", files=files, params=params)
+        assert response.status_code == 202
+
+        data = response.json()
+        assert data["status"] == "pending"
+
+        deadline = time.time() + 10.0
+        while time.time() < deadline:
+            response = client.get(f"/api/v1/jobs/{data['job_id']}")
+            assert response.status_code == 200
+            job = response.json()
+            if job["status"] in ("completed", "failed"):
+                break
+            time.sleep(0.05)
+
+        assert job["status"] == "completed"
+        assert "predictions" in job["result"]
+
+
+def test_workers_share_the_api_service():
+    """Test that job workers use the interpreters of the API service."""
+    assert router.job_workers.service_factory() is router.ml_service
+
+
+def test_unknown_job():
+    """Test polling a job that does not exist."""
+    client = TestClient(app)
+    response = client.get("/api/v1/jobs/does-not-exist")
+    assert response.status_code == 404
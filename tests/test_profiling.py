@@ -0,0 +1,159 @@
+"""Tests for per-request profiling.
+
+This module tests trace sampling, trace dumps and the profiling headers of
+the identification endpoint.
+"""
+
+import json
+import pstats
+import timeit
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi.testclient import TestClient
+
+from app.api.v1 import router
+from app.main import app
+from app.services.profiling import NULL_TRACE, Profiler, Trace
+
+client = TestClient(app)
+
+
+def test_sampling():
+    """Test that the sample rate and force flag decide what is traced."""
+    assert Profiler(sample_rate=0.0).start() is NULL_TRACE
+    assert isinstance(Profiler(sample_rate=1.0).start(), Trace)
+    assert Profiler(sample_rate=0.0).start(force=True) is NULL_TRACE
+    forced = Profiler(sample_rate=0.0, allow_force=True).start(force=True)
+    assert isinstance(forced, Trace)
+
+
+def test_trace_dump(tmp_path):
+    """Test that finished traces are written with their stages."""
+    profiler = Profiler(
+        use_cprofile=True, dump_dir=str(tmp_path), allow_force=True
+    )
+    trace = profiler.start(force=True)
+    with trace.stage("decode"):
+        sum(range(1000))
+    profiler.finish(trace).result()
+
+    with open(tmp_path / f"{trace.trace_id}.json") as f:
+        data = json.load(f)
+    assert [stage["name"] for stage in data["stages"]] == ["decode"]
+    assert data["total"] >= data["stages"][0]["duration"]
+    assert (tmp_path / f"{trace.trace_id}.prof").exists()
+
+
+def test_trace_dumps_are_capped(tmp_path):
+    """Test that only the newest traces are kept."""
+    profiler = Profiler(
+        sample_rate=1.0,
+        use_cprofile=True,
+        dump_dir=str(tmp_path),
+        max_traces=2,
+    )
+    trace_ids = []
+    for _ in range(4):
+        trace = profiler.start()
+        trace_ids.append(trace.trace_id)
+        profiler.finish(trace)
+    profiler.flush()
+
+    kept = {path.stem for path in tmp_path.iterdir()}
+    assert kept == set(trace_ids[2:])
+    assert len(list(tmp_path.iterdir())) == 4
+
+
+def test_one_cprofile_capture_at_a_time(tmp_path):
+    """Test that overlapping traces do not share the profiler."""
+    profiler = Profiler(
+        use_cprofile=True, dump_dir=str(tmp_path), allow_force=True
+    )
+    first = profiler.start(force=True)
+    second = profiler.start(force=True)
+    assert first.profile is not None
+    assert second.profile is None
+
+    profiler.finish(second)
+    profiler.finish(first)
+    third = profiler.start(force=True)
+    assert third.profile is not None
+    profiler.finish(third)
+
+
+def executor_work():
+    """Stand-in for inference run on an executor thread."""
+    return sum(range(1000))
+
+
+def test_cprofile_covers_executor_calls(tmp_path):
+    """Test that work handed to an executor thread is in the capture."""
+    profiler = Profiler(
+        use_cprofile=True, dump_dir=str(tmp_path), allow_force=True
+    )
+    trace = profiler.start(force=True)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        assert executor.submit(trace.call, executor_work).result() == 499500
+    profiler.finish(trace).result()
+
+    stats = pstats.Stats(str(tmp_path / f"{trace.trace_id}.prof"))
+    functions = {name for _, _, name in stats.stats}
+    assert "executor_work" in functions
+
+
+def test_disabled_hooks_are_cheap():
+    """Test that an untraced request's hooks stay in the sub-10us range."""
+    profiler = Profiler(sample_rate=0.0)
+
+    def request_hooks():
+        trace = profiler.start()
+        for name in ("read", "decode", "inference", "lookup"):
+            with trace.stage(name):
+                pass
+        profiler.finish(trace)
+
+    calls = 100_000
+    assert timeit.timeit(request_hooks, number=calls) / calls < 10e-6
+
+
+def test_identify_profile_header(sample_image, tmp_path, monkeypatch):
+    """Test that the X-Profile header traces the request when allowed."""
+    monkeypatch.setattr(router.profiler, "dump_dir", str(tmp_path))
+    monkeypatch.setattr(router.profiler, "allow_force", True)
+    files = {"image": ("test.png", sample_image, "image/png")}
+    params = {"threshold": 0.5, "max_results": 3}
+    response = client.post(
+        "/api/v1/identify",
+        files=files,
+        params=params,
+        headers={"X-Profile": "1"},
+    )
+    assert response.status_code == 200
+
+    trace_id = response.headers["X-Trace-Id"]
+    assert "read;dur=" in response.headers["Server-Timing"]
+    router.profiler.flush()
+    assert (tmp_path / f"{trace_id}.json").exists()
+
+
+def test_identify_ignores_profile_header_by_default(sample_image):
+    """Test that clients cannot force traces unless it is enabled."""
+    files = {"image": ("test.png", sample_image, "image/png")}
+    params = {"threshold": 0.5, "max_results": 3}
+    response = client.post(
+        "/api/v1/identify",
+        files=files,
+        params=params,
+        headers={"X-Profile": "1"},
+    )
+    assert response.status_code == 200
+    assert "X-Trace-Id" not in response.headers
+
+
+def test_identify_without_profile_header(sample_image):
+    """Test that untraced requests carry no trace headers."""
+    files = {"image": ("test.png", sample_image, "image/png")}
+    params = {"threshold": 0.5, "max_results": 3}
+    response = client.post("/api/v1/identify", files=files, params=params)
+    assert response.status_code == 200
+    assert "X-Trace-Id" not in response.headers
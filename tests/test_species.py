@@ -0,0 +1,198 @@
+"""Tests for species lists and class mask filtering.
+
+This module checks that masked top-k selection matches brute-force
+filtering, that species lists compile to the expected masks and that the
+identification endpoint honours the requested species list.
+"""
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from PIL import Image
+
+from app import queries
+from app.config import settings
+from app.main import app
+from app.services.ml import BACKGROUND_INDEX, MLService
+from app.services.species import SpeciesFilter, top_predictions
+
+client = TestClient(app)
+
+LABELS = [
+    "Cardinalis cardinalis",
+    "Cyanocitta cristata",
+    "Turdus migratorius",
+    "Struthio camelus",
+    "None",
+]
+
+
+@pytest.fixture
+def species_filter(tmp_path):
+    """Create a species filter with a single species list."""
+    (tmp_path / "feeder.txt").write_text(
+        "# Backyard birds\nCardinalis cardinalis\n\nBlue Jay\n"
+    )
+    return SpeciesFilter(LABELS, str(tmp_path), excluded=[4])
+
+
+def brute_force(scores, allowed, threshold, max_results):
+    """Filter and rank scores one class at a time."""
+    results = [
+        (score, index)
+        for index, score in enumerate(scores)
+        if index in allowed and score >= threshold
+    ]
+    results.sort(key=lambda x: x[0], reverse=True)
+    return [index for _, index in results[:max_results]]
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_top_predictions_match_brute_force(seed):
+    """Test masked top-k selection against brute-force filtering."""
+    rng = np.random.default_rng(seed)
+    scores = rng.random(965, dtype=np.float32)
+    mask = rng.random(965) < 0.2
+    threshold = float(rng.uniform(0.0, 0.9))
+    max_results = int(rng.integers(1, 20))
+
+    expected = brute_force(
+        scores, set(np.flatnonzero(mask)), threshold, max_results
+    )
+    result = top_predictions(scores, mask, threshold, max_results)
+    assert result.tolist() == expected
+
+
+def test_species_list_mask(species_filter):
+    """Test that scientific and common names compile to a class mask."""
+    assert species_filter.available() == ["feeder"]
+    mask = species_filter.mask("feeder")
+    assert mask.tolist() == [True, True, False, False, False]
+    assert species_filter.mask("feeder") is mask
+    assert species_filter.base_mask.tolist() == [True] * 4 + [False]
+
+
+def test_unknown_species_list(species_filter):
+    """Test that unknown species lists are rejected."""
+    assert not species_filter.exists("../feeder")
+    with pytest.raises(ValueError):
+        species_filter.mask("../feeder")
+
+
+def test_species_lists_are_scanned_once(species_filter, tmp_path):
+    """Test that request-time lookups do not list the directory again."""
+    (tmp_path / "late.txt").write_text("Turdus migratorius\n")
+    assert species_filter.available() == ["feeder"]
+    assert not species_filter.exists("late")
+
+
+def test_configured_species_lists_checked_at_startup(monkeypatch):
+    """Test that a misconfigured species list stops the service starting."""
+    monkeypatch.setattr(settings, "DEFAULT_SPECIES_LIST", "mars")
+    with pytest.raises(ValueError, match="mars"):
+        MLService()
+
+    monkeypatch.setattr(settings, "DEFAULT_SPECIES_LIST", None)
+    monkeypatch.setattr(
+        settings, "API_KEY_SPECIES_LISTS", {"key": "north_american_feeders"}
+    )
+    service = MLService()
+    assert "north_american_feeders" in service.species_filter._masks
+
+
+def test_unmatched_names_are_logged(species_filter, capsys):
+    """Test that names matching no model class are reported."""
+    mask = species_filter.compile(["Blue Jay", "Dodo", "Raphus cucullatus"])
+    assert mask.tolist() == [False, True, False, False, False]
+    output = capsys.readouterr().out
+    assert "Dodo" in output
+    assert "Blue Jay" not in output
+
+
+def test_scientific_names_are_chunked(monkeypatch):
+    """Test that long name lookups are split over several queries."""
+    monkeypatch.setattr(queries, "QUERY_CHUNK_SIZE", 1)
+    names = queries.get_scientific_names(["Blue Jay", "Northern Cardinal"])
+    assert names == {
+        "Blue Jay": "Cyanocitta cristata",
+        "Northern Cardinal": "Cardinalis cardinalis",
+    }
+
+
+def test_model_scores_and_labels():
+    """Test the output tensor scores and metadata labels of the model."""
+    service = MLService()
+    if service.interpreter is None:
+        pytest.skip("Model not available")
+    assert len(service.scientific_names) == 965
+    assert service.scientific_names[BACKGROUND_INDEX] == "None"
+
+    image = Image.open("tests/assets/test_bird.jpg").convert("RGB")
+    pixels = np.array(image.resize((224, 224)), dtype=np.uint8)
+    scores = service._invoke(service.interpreter, pixels)
+    assert scores.shape == (965,)
+    assert scores.dtype == np.float32
+    assert 0.0 <= scores.min() and scores.max() <= 1.0
+    assert service.scientific_names[int(np.argmax(scores))] != "None"
+
+
+# Top scores of the test image under the original Task API classifier
+BASELINE_TOP_SCORES = [
+    ("Agelaius phoeniceus", 0.5352),
+    ("Haemorhous mexicanus", 0.0820),
+    ("Sturnus vulgaris", 0.0508),
+]
+
+
+def test_model_scores_match_baseline():
+    """Test the interpreter's top scores against the Task API baseline.
+
+    tflite_runtime's quantized kernels round slightly differently, so
+    scores may move by a couple of quantization steps (1/256 each) but
+    the ranking must not change.
+    """
+    service = MLService()
+    if service.interpreter is None:
+        pytest.skip("Model not available")
+
+    with open("tests/assets/test_bird.jpg", "rb") as f:
+        pixels = service._preprocess_image(f.read())
+    scores = service._invoke(service.interpreter, pixels)
+    top = np.argsort(-scores, kind="stable")[: len(BASELINE_TOP_SCORES)]
+    for index, (name, score) in zip(top, BASELINE_TOP_SCORES):
+        assert service.scientific_names[index] == name
+        assert scores[index] == pytest.approx(score, abs=0.01)
+
+
+def test_species_lists_endpoint():
+    """Test listing the bundled species lists."""
+    response = client.get("/api/v1/species/lists")
+    assert response.status_code == 200
+    assert "north_american_feeders" in response.json()
+
+
+def test_identify_with_species_list(sample_image):
+    """Test that predictions are limited to the requested species list."""
+    with open("data/species_lists/north_american_feeders.txt") as f:
+        allowed = {line.strip() for line in f if not line.startswith("#")}
+
+    files = {"image": ("test.png", sample_image, "image/png")}
+    params = {
+        "threshold": 0.0,
+        "max_results": 5,
+        "species_list": "north_american_feeders",
+    }
+    response = client.post("/api/v1/identify", files=files, params=params)
+    assert response.status_code == 200
+
+    predictions = response.json()["predictions"]
+    assert predictions
+    assert all(pred["scientific_name"] in allowed for pred in predictions)
+
+
+def test_identify_unknown_species_list(sample_image):
+    """Test that an unknown species list is a client error."""
+    files = {"image": ("test.png", sample_image, "image/png")}
+    params = {"threshold": 0.5, "max_results": 3, "species_list": "mars"}
+    response = client.post("/api/v1/identify", files=files, params=params)
+    assert response.status_code == 400